@@ -3,6 +3,7 @@
 # import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 # import uvicorn
 
 from models.RestfulModel import *
@@ -10,7 +11,8 @@ from routers import ocr
 from utils.ImageHelper import *
 
 app = FastAPI(title="Paddle OCR API",
-              description="基于 Paddle OCR 和 FastAPI 的自用接口")
+              description="基于 Paddle OCR 和 FastAPI 的自用接口",
+              default_response_class=ORJSONResponse)
 
 
 # 跨域设置
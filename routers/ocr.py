@@ -1,23 +1,87 @@
 # -*- coding: utf-8 -*-
 
 from fastapi import APIRouter, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from models.OCRModel import *
 from models.RestfulModel import *
 from paddleocr import PaddleOCR
-from utils.ImageHelper import base64_to_ndarray, bytes_to_ndarray
-import requests
+import numpy as np
+import paddle
+from utils.CacheHelper import LRUCache, bytes_digest
+from utils.ImageHelper import base64_to_bytes, bytes_to_ndarray, is_supported_image
+import httpx
 import os
+import threading
 
 OCR_LANGUAGE = os.environ.get("OCR_LANGUAGE", "ch")
+OCR_REC_BATCH_NUM = int(os.environ.get("OCR_REC_BATCH_NUM", 6))  # 识别模型每批处理的文本行数
+OCR_CPU_THREADS = int(os.environ.get("OCR_CPU_THREADS", 10))  # CPU 推理线程数, 仅在启用 MKL-DNN 时生效
+OCR_ENABLE_MKLDNN = os.environ.get("OCR_ENABLE_MKLDNN", "false").lower() == "true"  # CPU 推理时启用 MKL-DNN 加速
+OCR_MKLDNN_BF16 = os.environ.get("OCR_MKLDNN_BF16", "false").lower() == "true"  # MKL-DNN 下使用 bfloat16, 需 CPU 支持 bf16
+OCR_USE_GPU = os.environ.get("OCR_USE_GPU", "true").lower() == "true"  # 未编译 CUDA 时自动回退至 CPU
+OCR_USE_TENSORRT = os.environ.get("OCR_USE_TENSORRT", "false").lower() == "true"  # 仅 GPU 版本生效, 每次启动都会重新构建 TensorRT 引擎
+OCR_ON_GPU = OCR_USE_GPU and paddle.is_compiled_with_cuda()
+# precision="fp16" 在 GPU 上对应 TensorRT FP16, 在 CPU 上被 PaddleOCR 映射为 MKL-DNN bfloat16
+OCR_USE_FP16 = OCR_USE_TENSORRT if OCR_ON_GPU else (OCR_ENABLE_MKLDNN and OCR_MKLDNN_BF16)
+OCR_PRECISION = "fp16" if OCR_USE_FP16 else "fp32"
+OCR_CACHE_SIZE = int(os.environ.get("OCR_CACHE_SIZE", 128))  # 识别结果缓存条数, 0 表示不缓存
 
 router = APIRouter(prefix="/ocr", tags=["OCR"])
 
-ocr = PaddleOCR(use_angle_cls=True, lang=OCR_LANGUAGE)
+ocr = PaddleOCR(use_angle_cls=True, lang=OCR_LANGUAGE,
+                rec_batch_num=OCR_REC_BATCH_NUM,
+                use_gpu=OCR_USE_GPU,
+                cpu_threads=OCR_CPU_THREADS,
+                enable_mkldnn=OCR_ENABLE_MKLDNN,
+                use_tensorrt=OCR_USE_TENSORRT,
+                precision=OCR_PRECISION)
+
+# 预测器非线程安全, 进程内串行推理; 需要并行时通过 WEB_CONCURRENCY 启动多个工作进程
+ocr_lock = threading.Lock()
+
+ocr_cache = LRUCache(maxsize=OCR_CACHE_SIZE)
+
+# 复用连接池, 避免每次请求重新建立连接; 服务端支持时使用 HTTP/2 多路复用
+http_client = httpx.AsyncClient(timeout=30, follow_redirects=True, http2=True)
+
+
+def ocr_image_bytes(image_bytes: bytes):
+    """识别图片字节, 相同内容的图片直接返回缓存结果
+
+    Args:
+        image_bytes (bytes): 图片字节
+
+    Returns:
+        list: PaddleOCR 识别结果
+    """
+    key = bytes_digest(image_bytes)
+    result = ocr_cache.get(key)
+    if result is None:
+        img = bytes_to_ndarray(image_bytes)
+        with ocr_lock:
+            result = ocr.ocr(img=img, cls=True)
+        ocr_cache.set(key, result)
+    return result
+
+
+@router.on_event("startup")
+def warm_up():
+    """启动时预热模型, 避免首个请求承担初始化开销
+    """
+    # 检测模型在空白图片上不会产生文本框, 因此单独以 det=False 预热方向分类与识别模型
+    ocr.ocr(np.zeros((32, 32, 3), dtype=np.uint8), cls=True)
+    ocr.ocr(np.zeros((48, 320, 3), dtype=np.uint8), det=False, cls=True)
+
+
+@router.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
 
 
 @router.get('/predict-by-path', response_model=RestfulModel, summary="识别本地图片")
 def predict_by_path(image_path: str):
-    result = ocr.ocr(image_path, cls=True)
+    with ocr_lock:
+        result = ocr.ocr(image_path, cls=True)
     restfulModel = RestfulModel(
         resultcode=200, message="Success", data=result, cls=OCRModel)
     return restfulModel
@@ -25,8 +89,8 @@ def predict_by_path(image_path: str):
 
 @router.post('/predict-by-base64', response_model=RestfulModel, summary="识别 Base64 数据")
 def predict_by_base64(base64model: Base64PostModel):
-    img = base64_to_ndarray(base64model.base64_str)
-    result = ocr.ocr(img=img, cls=True)
+    image_bytes = base64_to_bytes(base64model.base64_str)
+    result = ocr_image_bytes(image_bytes)
     restfulModel = RestfulModel(
         resultcode=200, message="Success", data=result, cls=OCRModel)
     return restfulModel
@@ -34,32 +98,36 @@ def predict_by_base64(base64model: Base64PostModel):
 
 @router.post('/predict-by-file', response_model=RestfulModel, summary="识别上传文件")
 async def predict_by_file(file: UploadFile):
-    restfulModel: RestfulModel = RestfulModel()
-    if file.filename.endswith((".jpg", ".png")):  # 只处理常见格式图片
-        restfulModel.resultcode = 200
-        restfulModel.message = file.filename
-        file_data = file.file
-        file_bytes = file_data.read()
-        img = bytes_to_ndarray(file_bytes)
-        result = ocr.ocr(img=img, cls=True)
-        restfulModel.data = result
-    else:
+    # 依次检查文件名后缀, Content-Type 与文件头, 不合规的上传无需读入内存
+    # 未声明或声明为 application/octet-stream 的上传交由文件头判断
+    content_type = file.content_type or "application/octet-stream"
+    is_image = file.filename.endswith((".jpg", ".png"))  # 只处理常见格式图片
+    is_image = is_image and (content_type.startswith("image/") or content_type == "application/octet-stream")
+    if is_image:
+        is_image = is_supported_image(await file.read(8))
+        await file.seek(0)
+    if not is_image:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="请上传 .jpg 或 .png 格式图片"
         )
+    restfulModel: RestfulModel = RestfulModel()
+    restfulModel.resultcode = 200
+    restfulModel.message = file.filename
+    file_bytes = await file.read()
+    result = await run_in_threadpool(ocr_image_bytes, file_bytes)
+    restfulModel.data = result
     return restfulModel
 
 
 @router.get('/predict-by-url', response_model=RestfulModel, summary="识别图片 URL")
 async def predict_by_url(imageUrl: str):
     restfulModel: RestfulModel = RestfulModel()
-    response = requests.get(imageUrl)
+    response = await http_client.get(imageUrl)
     image_bytes = response.content
-    if image_bytes.startswith(b"\xff\xd8\xff") or image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):  # 只处理常见格式图片 (jpg / png)
+    if is_supported_image(image_bytes):  # 只处理常见格式图片 (jpg / png)
         restfulModel.resultcode = 200
-        img = bytes_to_ndarray(image_bytes)
-        result = ocr.ocr(img=img, cls=True)
+        result = await run_in_threadpool(ocr_image_bytes, image_bytes)
         restfulModel.data = result
         restfulModel.message = "Success"
     else:
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def bytes_digest(data: bytes) -> bytes:
+    """计算字节内容摘要, 用作缓存键
+
+    Args:
+        data (bytes): 字节内容
+
+    Returns:
+        bytes: 16 字节 BLAKE2b 摘要
+    """
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存, maxsize 为 0 时不缓存
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
@@ -5,27 +5,38 @@ import base64
 import cv2
 import numpy as np
 
+IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n")  # jpg / png 文件头
 
-def base64_to_ndarray(b64_data: str):
-    """base64转numpy数组
+
+def is_supported_image(img_bytes: bytes) -> bool:
+    """根据文件头判断是否为支持的图片格式 (jpg / png)
+
+    Args:
+        img_bytes (bytes): 图片字节, 至少包含前 8 个字节
+
+    Returns:
+        bool: 是否为 jpg 或 png 图片
+    """
+    return img_bytes.startswith(IMAGE_SIGNATURES)
+
+
+def base64_to_bytes(b64_data: str) -> bytes:
+    """base64转图片字节
 
     Args:
         b64_data (str): base64数据
 
     Returns:
-        _type_: _description_
+        bytes: 图片字节
     """
-    image_bytes = base64.b64decode(b64_data)
-    image_np = np.frombuffer(image_bytes, dtype=np.uint8)
-    image_np2 = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-    return image_np2
+    return base64.b64decode(b64_data)
 
 
-def bytes_to_ndarray(img_bytes: str):
+def bytes_to_ndarray(img_bytes: bytes):
     """字节转numpy数组
 
     Args:
-        img_bytes (str): 图片字节
+        img_bytes (bytes): 图片字节
 
     Returns:
         _type_: _description_